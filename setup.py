@@ -10,7 +10,7 @@ setup(
     license='MIT',
     long_description=open('README.md', 'r').read(),
     url='https://github.com/omnivector-solutions/slurm-ops-manager',
-    install_requires=['jinja2 > 3.0.0', 'pycryptodome'],
-    python_requires='>=3.6',
+    install_requires=['jinja2 > 3.0.0', 'cryptography'],
+    python_requires='>=3.8',
     package_data={'slurm_ops_manager': ['templates/*']},
 )
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 """This module provides the SlurmDebManager."""
 import logging
-import shlex
+import os
 import subprocess
+from functools import cached_property
 from pathlib import Path
 
-from slurm_ops_manager.slurm_ops_base import SlurmOpsManagerBase
+from slurm_ops_manager.slurm_ops_base import _run_spawn, SlurmOpsManagerBase
 
 
 logger = logging.getLogger()
@@ -28,16 +29,16 @@ class SlurmDebManager(SlurmOpsManagerBase):
     def _mail_prog(self) -> Path:
         return Path("/usr/bin/mail.mailutils")
 
-    @property
+    @cached_property
     def slurm_version(self) -> str:
-        """Return slurm verion."""
+        """Return slurm verion, resolved at most once per instance."""
         cmd = 'dpkg --status slurm-client | grep "^Version"'
         version = subprocess.check_output(cmd, shell=True)
         return version.decode().split(":")[-1].strip()
 
-    @property
+    @cached_property
     def munge_version(self) -> str:
-        """Return munge verion."""
+        """Return munge verion, resolved at most once per instance."""
         cmd = 'dpkg --status munge | grep "^Version"'
         version = subprocess.check_output(cmd, shell=True)
         return version.decode().split(":")[-1].strip()
@@ -57,42 +58,70 @@ class SlurmDebManager(SlurmOpsManagerBase):
             ppa = "ppa:ubuntu-hpc/slurm-wlm-23.02"
 
         logger.debug(f"## Adding ppa {ppa}.")
+        cmd = ["add-apt-repository", "--yes", "--update", ppa]
         try:
-            cmd = f'add-apt-repository --yes --update "{ppa}"'
-            subprocess.check_output(shlex.split(cmd))
+            subprocess.check_output(cmd)
         except subprocess.CalledProcessError as e:
             logger.error(f"## Error setting up {cmd}: {e}")
             return False
 
         return True
 
+    def _slurm_installed(self) -> bool:
+        """Return True if the slurm component deb is currently installed.
+
+        dpkg exits 0 for removed-but-not-purged packages too, so check
+        the recorded status rather than the exit code.
+        """
+        ret = subprocess.run(["dpkg-query", "--show",
+                              "--showformat", "${db:Status-Status}",
+                              self._slurm_component],
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL)
+        return ret.stdout == b"installed"
+
     def _install_slurm_from_deb(self) -> bool:
         """Install Slurm debs.
 
         Returns:
             bool: True on success and False otherwise.
         """
-        subprocess.check_output(["apt-get", "update"])
-
-        # update specific needed dependencies
-        logger.debug("## Installing dependencies")
-        subprocess.check_output(["apt-get", "install", "--yes", "mailutils", "logrotate"])
-
-        # setup munge
-        logger.debug("## Installing munge")
-        subprocess.check_output(["apt-get", "install", "--yes", "munge"])
-        subprocess.check_output(["systemctl", "enable", self._munged_systemd_service])
+        _run_spawn(["apt-get", "update"], check=True)
 
+        # install the dependencies, munge and the slurm component in a
+        # single apt transaction so the resolver only runs once
         slurm_component = self._slurm_component
-        logger.debug(f"## Installing {slurm_component}")
+        packages = ["mailutils", "logrotate", "munge",
+                    slurm_component, "slurm-client"]
+
+        logger.debug(f"## Installing {slurm_component} and dependencies")
         try:
-            subprocess.check_output(["apt-get", "install", "--yes",
-                                     slurm_component, "slurm-client"])
+            # skip the recommends graph and any debconf prompting; the
+            # packages we need are all listed explicitly
+            subprocess.check_output(
+                ["apt-get", "install", "--yes", "--no-install-recommends",
+                 "-o", "Dpkg::Use-Pty=0", *packages],
+                env={**os.environ, "DEBIAN_FRONTEND": "noninteractive"})
         except subprocess.CalledProcessError as e:
             logger.error(f"## Error installing {slurm_component} - {e}")
             return False
 
-        subprocess.check_output(["apt-get", "autoremove", "--yes"])
+        _run_spawn(["apt-get", "autoremove", "--yes"], check=True)
+
+        return True
+
+    def _post_install_setup(self) -> None:
+        """Enable units and lay down overrides and the lib64 symlink.
+
+        These steps are cheap and idempotent, so they run on every
+        setup_slurm call - including when the debs were already present
+        (golden image, or a previous run that failed between the apt
+        transaction and here).
+        """
+        # enable munge and the slurm unit with one systemctl invocation
+        _run_spawn(["systemctl", "enable",
+                    self._munged_systemd_service,
+                    self._slurm_systemd_service], check=True)
 
         # we need to override the default service unit for slurmrestd only
         if "slurmrestd" == self._slurm_component:
@@ -105,11 +134,14 @@ class SlurmDebManager(SlurmOpsManagerBase):
         if not lib64_slurm.exists():
             lib64_slurm.symlink_to("/usr/lib/x86_64-linux-gnu/slurm-wlm/")
 
-        return True
-
     def upgrade(self) -> bool:
         """Run upgrade operations."""
-        return self._install_slurm_from_deb()
+        if not self._install_slurm_from_deb():
+            return False
+
+        # the upgraded packages may have replaced our unit override
+        self._post_install_setup()
+        return True
 
     def setup_slurm(self, custom_ppa: str = "") -> bool:
         """Install Slurm and its dependencies.
@@ -122,15 +154,22 @@ class SlurmDebManager(SlurmOpsManagerBase):
         """
         if not self._setup_ppas(custom_ppa):
             return False
-        if not self._install_slurm_from_deb():
+
+        # fast path: the apt transaction already ran on a previous
+        # reconciliation; upgrade() still calls _install_slurm_from_deb
+        # directly when newer packages are wanted. Only the package
+        # install is skipped; unit setup is (re)checked below regardless.
+        if self._slurm_installed():
+            logger.debug(f"## {self._slurm_component} already installed")
+        elif not self._install_slurm_from_deb():
             return False
 
+        self._post_install_setup()
+
         # create needed paths with correct permisions
         self._setup_paths()
 
         if self._slurm_component in ["slurmctld", "slurmd"]:
             self._setup_plugstack_dir_and_config()
 
-        self.slurm_systemctl('enable')
-
         return True
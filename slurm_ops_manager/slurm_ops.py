@@ -1,6 +1,7 @@
 """This module provides the SlurmManager."""
 import logging
 import subprocess
+from collections.abc import Mapping
 from pathlib import Path
 
 from ops.framework import (
@@ -8,10 +9,6 @@ from ops.framework import (
     StoredState,
 )
 from slurm_ops_manager import utils
-from slurm_ops_manager.slurm_ops_managers import (
-    SlurmDebManager,
-    SlurmRpmManager,
-)
 
 
 logger = logging.getLogger()
@@ -34,9 +31,13 @@ class SlurmManager(Object):
 
         operating_system = utils.operating_system()
 
+        # import only the manager for the host OS - the re-export shim
+        # resolves them lazily
         if operating_system == "ubuntu":
+            from slurm_ops_manager.slurm_ops_managers import SlurmDebManager
             self._slurm_resource_manager = SlurmDebManager(component)
         elif operating_system == "centos" or operating_system == "rocky":
+            from slurm_ops_manager.slurm_ops_managers import SlurmRpmManager
             self._slurm_resource_manager = SlurmRpmManager(component)
         else:
             raise Exception("Unsupported OS")
@@ -162,8 +163,11 @@ class SlurmManager(Object):
                 return False
 
         self._slurm_resource_manager.setup_logrotate()
-        self._slurm_resource_manager.create_systemd_override_for_nofile()
-        self._slurm_resource_manager.daemon_reload()
+
+        # daemon-reload parses every unit file on the system; only pay
+        # for it when the override actually changed
+        if self._slurm_resource_manager.create_systemd_override_for_nofile():
+            self._slurm_resource_manager.daemon_reload()
 
         # At this point, munged and slurmxxxd are enabled, we stop them to have
         # a consistent startup sequence in the charms
@@ -207,28 +211,43 @@ class SlurmManager(Object):
         """Get the current nhc configuration."""
         return self._slurm_resource_manager.get_nhc_config()
 
-    def render_slurm_configs(self, slurm_config) -> None:
-        """Render the slurm.conf and munge key, restart slurm and munge."""
-        if not type(slurm_config) == dict:
+    def render_slurm_configs(self, slurm_config) -> bool:
+        """Render the slurm.conf and munge key, restart slurm and munge.
+
+        Returns True if any of the slurm config files changed on disk,
+        False otherwise. cgroup.conf and acct_gather.conf count too -
+        their contents are not part of slurm.conf, and the daemons only
+        reload them on restart.
+        """
+        if not isinstance(slurm_config, Mapping):
             raise TypeError("Incorrect type for config.")
 
+        changed = False
+
         # cgroup config will not always exist. We need to check for
         # cgroup_config and only write the cgroup.conf if
         # cgroup_config exists in the slurm_config object.
         if slurm_config.get('cgroup_config'):
             cgroup_config = slurm_config['cgroup_config']
-            self._slurm_resource_manager.write_cgroup_conf(cgroup_config)
+            changed |= self._slurm_resource_manager.write_cgroup_conf(
+                cgroup_config)
 
         # acct_gather config will not always exist. We need to check for
         # acct_gather and only write the acct_gather.conf if we have
         # acct_gather in the slurm_config object.
         if slurm_config.get('acct_gather'):
-            self._slurm_resource_manager.write_acct_gather_conf(slurm_config)
+            changed |= self._slurm_resource_manager.write_acct_gather_conf(
+                slurm_config)
         else:
-            self._slurm_resource_manager.remove_acct_gather_conf()
+            changed |= self._slurm_resource_manager.remove_acct_gather_conf()
+
+        # Write slurm.conf and let the caller know whether anything
+        # changed, so the slurm component restart can be skipped on
+        # no-op reconfigs.
+        changed |= self._slurm_resource_manager.write_slurm_config(
+            slurm_config)
 
-        # Write slurm.conf and restart the slurm component.
-        self._slurm_resource_manager.write_slurm_config(slurm_config)
+        return changed
 
     def create_configless_systemd_override(self, host, port):
         """Proxy for slurm_ops_base.create_configless_systemd_override."""
@@ -272,9 +291,12 @@ class SlurmManager(Object):
         """
         return self._slurm_resource_manager.check_munged()
 
-    def slurm_cmd(self, command, arg_string):
-        """Run a slurm command."""
-        return self._slurm_resource_manager.slurm_cmd(command, arg_string)
+    def slurm_cmd(self, command, args):
+        """Run a slurm command.
+
+        args may be a string or a pre-tokenized sequence of arguments.
+        """
+        return self._slurm_resource_manager.slurm_cmd(command, args)
 
     def generate_jwt_rsa(self) -> str:
         """Generate the jwt rsa key."""
@@ -294,7 +316,10 @@ class SlurmManager(Object):
         if Path("/var/run/reboot-required").exists():
             return True
         if Path("/bin/needs-restarting").exists(): # only on CentOS
-            p = subprocess.run(["/bin/needs-restarting", "--reboothint"])
+            p = subprocess.run(["/bin/needs-restarting", "--reboothint"],
+                               stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
             if p.returncode == 1:
                 return True
 
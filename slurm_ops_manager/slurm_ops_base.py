@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """This module provides the SlurmInstallManager."""
+import filecmp
+import grp
 import logging
 import os
+import pwd
 import shlex
 import shutil
 import subprocess
+import tempfile
+import time
 from base64 import b64decode, b64encode
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from shutil import rmtree
 
-from Crypto.PublicKey import RSA
-from jinja2 import Environment, FileSystemLoader
 from slurm_ops_manager.utils import get_hostname
 from slurm_ops_manager.utils import operating_system
 
@@ -20,41 +26,254 @@ logger = logging.getLogger()
 
 TEMPLATE_DIR = Path(os.path.dirname(os.path.abspath(__file__))) / 'templates'
 
+_AUTOGEN_BASE = ("./autogen.sh", "--prefix=/usr", "--sysconfdir=/etc")
+
+# Keyword defaults for status-probe subprocess invocations, where a
+# non-zero exit is an answer rather than an error. DEVNULL stdio keeps
+# children off the hook runner's pipes, and close_fds=False lets
+# CPython spawn via posix_spawn instead of fork on Linux. Commands that
+# are expected to succeed go through _run_spawn instead, which keeps
+# their stderr for the log.
+_SPAWN_KW = {
+    'stdin': subprocess.DEVNULL,
+    'stdout': subprocess.DEVNULL,
+    'stderr': subprocess.DEVNULL,
+    'close_fds': False,
+}
+
+_PORT_MAP = {
+    'slurmctld': "6817",
+    'slurmd': "6818",
+    'slurmdbd': "6819",
+    'slurmrestd': "6820",
+}
+
+# Note: missing slurm cmds
+# Body: Need to extend this list to include all slurm user cmds
+_SLURM_CMDS = frozenset((
+    "sacct",
+    "sacctmgr",
+    "salloc",
+    "sattach",
+    "sbatch",
+    "sbcast",
+    "scancel",
+    "scontrol",
+    "sdiag",
+    "sinfo",
+    "sprio",
+    "squeue",
+    "sreport",
+    "srun",
+    "sshare",
+    "sstat",
+    "strigger",
+))
+
+_SUPPORTED_SYSTEMCTL_CMDS = frozenset((
+    "enable",
+    "start",
+    "stop",
+    "restart",
+))
+
+
+def _run_spawn(cmd, check=False):
+    """Run a command with _SPAWN_KW stdio but stderr captured.
+
+    The child's stderr is logged when it exits non-zero so failures on
+    these otherwise-quiet paths stay diagnosable in the hook log. With
+    check=True a CalledProcessError carrying the stderr is raised, as
+    subprocess.run would.
+    """
+    result = subprocess.run(cmd, **{**_SPAWN_KW,
+                                    'stderr': subprocess.PIPE})
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace").strip()
+        argv = " ".join(str(arg) for arg in cmd)
+        logger.error(f"## `{argv}` failed: {stderr}")
+        if check:
+            raise subprocess.CalledProcessError(result.returncode, cmd,
+                                                stderr=result.stderr)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _get_user_uid(user) -> int:
+    """Return the uid for the given user, resolved at most once."""
+    return pwd.getpwnam(user).pw_uid
+
+
+@lru_cache(maxsize=None)
+def _get_group_gid(group) -> int:
+    """Return the gid for the given group, resolved at most once."""
+    return grp.getgrnam(group).gr_gid
+
+
+def _user_exists(user) -> bool:
+    """Return True if the user already exists on the system."""
+    try:
+        pwd.getpwnam(user)
+        return True
+    except KeyError:
+        return False
+
+
+def _group_exists(group) -> bool:
+    """Return True if the group already exists on the system."""
+    try:
+        grp.getgrnam(group)
+        return True
+    except KeyError:
+        return False
+
+
+def _chown_recursive(path, user, group) -> None:
+    """Chown a directory tree in-process instead of forking chown -R."""
+    uid = _get_user_uid(user)
+    gid = _get_group_gid(group)
+
+    os.chown(path, uid, gid)
+    for dirpath, dirnames, filenames in os.walk(path):
+        for name in dirnames + filenames:
+            os.chown(os.path.join(dirpath, name), uid, gid)
+
+
+@lru_cache(maxsize=1)
+def _systemd_manager():
+    """Return a loaded pystemd Manager, or None when pystemd is missing.
+
+    The single D-Bus connection is reused by every systemd operation in
+    the process, avoiding a systemctl fork/exec per call.
+    """
+    try:
+        from pystemd.systemd1 import Manager
+        manager = Manager()
+        manager.load()
+    except ImportError:
+        return None
+    except Exception as e:
+        # pystemd present but D-Bus unreachable (containers, degraded
+        # systemd) - fall back to forking systemctl
+        logger.debug(f"## pystemd unavailable, using systemctl: {e}")
+        return None
+
+    return manager
+
+
+def _wait_for_unit_job(manager, job, service, want_active, timeout=30.0):
+    """Wait for a queued systemd job to finish, then check the unit.
+
+    StartUnit/StopUnit/RestartUnit return as soon as the job is queued,
+    while a forked systemctl blocks until it completes - and callers
+    like handle_restart_munged probe the daemon right after. Track the
+    returned job object path until it leaves the job queue (no initial
+    sleep, so jobs that complete immediately cost one ListJobs round
+    trip) and only then read the unit's final state, which cannot
+    misread the pre-restart state as completion.
+    """
+    from pystemd.systemd1 import Unit
+
+    deadline = time.monotonic() + timeout
+    while any(queued[4] == job for queued in manager.Manager.ListJobs()):
+        if time.monotonic() >= deadline:
+            logger.error(f"## Timed out waiting for {service} to settle")
+            return False
+        time.sleep(0.05)
+
+    unit = Unit(service.encode())
+    unit.load()
+    state = unit.Unit.ActiveState
+
+    ok = state == b"active" if want_active \
+        else state in (b"inactive", b"failed")
+    if not ok:
+        logger.error(
+            f"## {service} is {state.decode()} after its job finished")
+    return ok
+
+
+def _systemctl_over_dbus(operation, service):
+    """Run a systemctl operation for a unit over D-Bus.
+
+    Returns True/False for success/failure, or None when pystemd is not
+    available and the caller should fall back to forking systemctl.
+    """
+    manager = _systemd_manager()
+    if manager is None:
+        return None
+
+    unit = service.encode()
+    try:
+        if operation == "enable":
+            manager.Manager.EnableUnitFiles([unit], False, True)
+            return True
+        if operation == "start":
+            job = manager.Manager.StartUnit(unit, b"replace")
+        elif operation == "stop":
+            job = manager.Manager.StopUnit(unit, b"replace")
+        elif operation == "restart":
+            job = manager.Manager.RestartUnit(unit, b"replace")
+        return _wait_for_unit_job(manager, job, service,
+                                  want_active=operation != "stop")
+    except Exception as e:
+        logger.error(f"## Error running {operation} for {service} over D-Bus: {e}")
+        return False
+
+
+def _unit_is_active_over_dbus(service):
+    """Return whether a unit is active, queried over D-Bus.
+
+    Returns None when pystemd is not available so the caller can fall
+    back to forking systemctl.
+    """
+    if _systemd_manager() is None:
+        return None
+
+    try:
+        from pystemd.systemd1 import Unit
+        unit = Unit(service.encode())
+        unit.load()
+        return unit.Unit.ActiveState == b"active"
+    except Exception as e:
+        logger.error(f"## Error querying {service} over D-Bus: {e}")
+        return False
+
+
+@lru_cache(maxsize=1)
+def _template_environment():
+    """Return the shared jinja2 environment for the charm templates.
+
+    The environment is created lazily on first use and cached for the
+    lifetime of the process, so templates are only parsed once. A
+    bytecode cache on disk carries compiled templates across the
+    short-lived charm hook processes.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    bytecode_cache = None
+    try:
+        from jinja2 import FileSystemBytecodeCache
+        cache_dir = Path("/var/cache/slurm-ops/jinja")
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+    except OSError:
+        # unwritable cache dir just means templates are re-parsed once
+        # per process, as before
+        pass
+
+    return Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        auto_reload=False,
+        bytecode_cache=bytecode_cache,
+    )
+
 
 class SlurmOpsManagerBase:
     """Base class for slurm ops."""
 
     def __init__(self, component):
         """Set the initial values for attributes in the base class."""
-        port_map = {
-            'slurmctld': "6817",
-            'slurmd': "6818",
-            'slurmdbd': "6819",
-            'slurmrestd': "6820",
-        }
-
-        # Note: missing slurm cmds
-        # Body: Need to extend this list to include all slurm user cmds
-        self._slurm_cmds = [
-            "sacct",
-            "sacctmgr",
-            "salloc",
-            "sattach",
-            "sbatch",
-            "sbcast",
-            "scancel",
-            "scontrol",
-            "sdiag",
-            "sinfo",
-            "sprio",
-            "squeue",
-            "sreport",
-            "srun",
-            "sshare",
-            "sstat",
-            "strigger",
-        ]
-
         logger.debug(f'__init__(): component={component}')
 
         if component in ['slurmd', 'slurmctld', 'slurmrestd']:
@@ -67,24 +286,46 @@ class SlurmOpsManagerBase:
             raise Exception(f'slurm component {component} not supported')
 
         self._slurm_component = component
-
-        self._slurmd_log_file = self._slurm_log_dir / 'slurmd.log'
-        self._slurmctld_log_file = self._slurm_log_dir / 'slurmctld.log'
-        self._slurmdbd_log_file = self._slurm_log_dir / 'slurmdbd.log'
-
-        self._slurmd_pid_file = self._slurm_pid_dir / 'slurmd.pid'
-        self._slurmctld_pid_file = self._slurm_pid_dir / 'slurmctld.pid'
-        self._slurmdbd_pid_file = self._slurm_pid_dir / 'slurmdbd.pid'
+        self._staging_dir = None
+        self._staged_removals = []
 
         # NOTE: Come back to mitigate this configless cruft
-        self._slurmctld_parameters = ["enable_configless"]
+        self._slurmctld_parameters = ("enable_configless",)
 
         self._hostname = get_hostname()
-        self._port = port_map[self._slurm_component]
+        self._port = _PORT_MAP[self._slurm_component]
 
         self._slurm_conf_template_location = \
             TEMPLATE_DIR / self._slurm_conf_template_name
 
+        # Templates ship with the charm and cannot disappear at runtime,
+        # so verify once here instead of stat-ing on every render.
+        if not self._slurm_conf_template_location.exists():
+            raise FileNotFoundError(
+                "The slurm config template cannot be found."
+            )
+
+        # Static template context - none of these values change after
+        # construction, so build the dict once instead of per render.
+        self._common_config = {
+            'munge_socket': str(self._munge_socket),
+            'mail_prog': str(self._mail_prog),
+            'slurm_state_dir': str(self._slurm_state_dir),
+            'slurm_spool_dir': str(self._slurm_spool_dir),
+            'slurm_plugin_dir': str(self._slurm_plugin_dir),
+            'slurmdbd_log_file': str(self._slurmdbd_log_file),
+            'slurmd_log_file': str(self._slurmd_log_file),
+            'slurmctld_log_file': str(self._slurmctld_log_file),
+            'slurmdbd_pid_file': str(self._slurmdbd_pid_file),
+            'slurmd_pid_file': str(self._slurmd_pid_file),
+            'slurmctld_pid_file': str(self._slurmctld_pid_file),
+            'jwt_rsa_key_file': str(self._jwt_rsa_key_file),
+            'slurmctld_parameters': ",".join(self._slurmctld_parameters),
+            'slurm_plugstack_conf': str(self._slurm_plugstack_conf),
+            'slurm_user': str(self._slurm_user),
+            'slurmd_user': str(self._slurmd_user),
+        }
+
     @property
     def hostname(self) -> str:
         """Return the hostname."""
@@ -103,183 +344,118 @@ class SlurmOpsManagerBase:
     @property
     def slurm_is_active(self) -> bool:
         """Return True if the slurm component is running."""
-        try:
-            cmd = f"systemctl is-active {self._slurm_systemd_service}"
-            r = subprocess.check_output(shlex.split(cmd))
-            r = r.decode().strip().lower()
-            logger.debug(f"### systemctl is-active {self._slurm_systemd_service}: {r}")
-            return 'active' == r
-        except subprocess.CalledProcessError as e:
-            logger.error(f"#### Error checking if slurm is active: {e}")
-            return False
-        return False
+        active = _unit_is_active_over_dbus(self._slurm_systemd_service)
+        if active is not None:
+            logger.debug(f"### {self._slurm_systemd_service} active: {active}")
+            return active
+
+        # --quiet answers via the exit code alone, so systemd skips the
+        # state-string output and any journal lookups behind it
+        r = subprocess.run(["systemctl", "--quiet", "is-active",
+                            self._slurm_systemd_service], **_SPAWN_KW)
+        active = r.returncode == 0
+        logger.debug(f"### {self._slurm_systemd_service} active: {active}")
+        return active
 
     @staticmethod
     def daemon_reload():
         """Reload systemd service units."""
-        logger.debug("## issuing systemctl daemon-reload")
-        subprocess.call(["systemctl", "daemon-reload"])
+        logger.debug("## issuing systemd daemon-reload")
+
+        # one Reload() message on the shared D-Bus connection beats
+        # forking systemctl, which sets up its own connection per run
+        manager = _systemd_manager()
+        if manager is not None:
+            try:
+                manager.Manager.Reload()
+                return
+            except Exception as e:
+                logger.error(f"## Error reloading systemd over D-Bus: {e}")
+
+        _run_spawn(["systemctl", "daemon-reload"])
 
     def slurm_systemctl(self, operation) -> bool:
         """Run systemd commands for Slurm service units."""
         logger.debug(f"## Running slurm_systemctl {operation}")
-        supported_systemctl_cmds = [
-            "enable",
-            "start",
-            "stop",
-            "restart",
-        ]
 
-        if operation not in supported_systemctl_cmds:
+        if operation not in _SUPPORTED_SYSTEMCTL_CMDS:
             msg = f"## Unsupported systemctl command: {operation}"
             logger.error(msg)
             raise Exception(msg)
+
+        dbus_result = _systemctl_over_dbus(operation,
+                                           self._slurm_systemd_service)
+        if dbus_result is not None:
+            return dbus_result
+
         try:
-            subprocess.check_output([
+            _run_spawn([
                 "systemctl",
                 operation,
                 self._slurm_systemd_service,
-            ])
+            ], check=True)
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"## Error running {operation}: {e}")
             return False
 
-    @property
-    def _slurm_bin_dir(self) -> Path:
-        """Return the directory where the slurm bins live."""
-        return Path("/usr/bin")
+    # Constant paths, file names and account identities. Plain class
+    # attributes built once at class creation - attribute access costs a
+    # dict lookup instead of a property call plus a fresh Path object.
+    _slurm_bin_dir = Path("/usr/bin")
+    _slurm_conf_dir = Path("/etc/slurm")
+    _slurm_spool_dir = Path("/var/spool/slurmd")
+    _slurm_state_dir = Path("/var/spool/slurmctld")
+    _slurm_log_dir = Path("/var/log/slurm")
+    _slurm_pid_dir = Path("/var/run/")
 
-    @property
-    def _slurm_conf_dir(self) -> Path:
-        """Return the directory for Slurm configuration files."""
-        return Path("/etc/slurm")
+    _slurmd_log_file = _slurm_log_dir / 'slurmd.log'
+    _slurmctld_log_file = _slurm_log_dir / 'slurmctld.log'
+    _slurmdbd_log_file = _slurm_log_dir / 'slurmdbd.log'
 
-    @property
-    def _slurm_spool_dir(self) -> Path:
-        """Return the directory for slurmd's state information."""
-        return Path("/var/spool/slurmd")
+    _slurmd_pid_file = _slurm_pid_dir / 'slurmd.pid'
+    _slurmctld_pid_file = _slurm_pid_dir / 'slurmctld.pid'
+    _slurmdbd_pid_file = _slurm_pid_dir / 'slurmdbd.pid'
 
-    @property
-    def _slurm_state_dir(self) -> Path:
-        """Return the directory for slurmctld's state information."""
-        return Path("/var/spool/slurmctld")
+    _jwt_rsa_key_file = _slurm_state_dir / "jwt_hs256.key"
 
-    @property
-    def _slurm_plugin_dir(self) -> Path:
-        """Return the path for the Slurm plugin dir."""
-        raise Exception("Inheriting object needs to define this property.")
+    _munge_key_path = Path("/etc/munge/munge.key")
+    _munge_socket = Path("/var/run/munge/munge.socket.2")
+    _munged_systemd_service = "munge.service"
+    _munge_user = "munge"
+    _munge_group = "munge"
 
-    @property
-    def _slurm_log_dir(self) -> Path:
-        """Return the directory for Slurm logs."""
-        return Path("/var/log/slurm")
+    _slurm_plugstack_dir = Path("/etc/slurm/plugstack.conf.d")
+    _slurm_plugstack_conf = _slurm_conf_dir / 'plugstack.conf'
 
-    @property
-    def _slurm_pid_dir(self) -> Path:
-        """Return the directory for Slurm PID file."""
-        return Path("/var/run/")
+    _slurm_user = "slurm"
+    _slurm_user_id = "64030"
+    _slurm_group = "slurm"
+    _slurm_group_id = "64030"
+
+    _slurmd_user = "root"
+    _slurmd_group = "root"
+
+    _slurmrestd_user_id = "64031"
+    _slurmrestd_user_name = "slurmrestd"
+    _slurmrestd_group_id = "64031"
+    _slurmrestd_group_name = "slurmrestd"
 
     @property
-    def _jwt_rsa_key_file(self) -> Path:
-        """Return the jwt rsa key file path."""
-        return self._slurm_state_dir / "jwt_hs256.key"
+    def _slurm_plugin_dir(self) -> Path:
+        """Return the path for the Slurm plugin dir."""
+        raise Exception("Inheriting object needs to define this property.")
 
     @property
     def _mail_prog(self) -> Path:
         """Return the full path for the mailing program."""
         raise Exception("Inheriting object needs to define this property.")
 
-    @property
-    def _munge_key_path(self) -> Path:
-        """Return the full path to the munge key."""
-        return Path("/etc/munge/munge.key")
-
-    @property
-    def _munge_socket(self) -> Path:
-        """Return the munge socket."""
-        return Path("/var/run/munge/munge.socket.2")
-
-    @property
-    def _munged_systemd_service(self) -> str:
-        """Return the name of the Munge Systemd unit file."""
-        return "munge.service"
-
-    @property
-    def _munge_user(self) -> str:
-        """Return the user for munge daemon."""
-        return "munge"
-
-    @property
-    def _munge_group(self) -> str:
-        """Return the group for munge daemon."""
-        return "munge"
-
-    @property
-    def _slurm_plugstack_dir(self) -> Path:
-        """Return the directory to the SPANK plugins."""
-        return Path("/etc/slurm/plugstack.conf.d")
-
-    @property
-    def _slurm_plugstack_conf(self) -> Path:
-        """Return the full path to the root plugstack configuration file."""
-        return self._slurm_conf_dir / 'plugstack.conf'
-
     @property
     def _slurm_systemd_service(self) -> str:
         """Return the Slurm systemd unit file."""
         return f"{self._slurm_component}.service"
 
-    @property
-    def _slurm_user(self) -> str:
-        """Return the slurm user."""
-        return "slurm"
-
-    @property
-    def _slurm_user_id(self) -> str:
-        """Return the slurm user ID."""
-        return "64030"
-
-    @property
-    def _slurm_group(self) -> str:
-        """Return the slurm group."""
-        return "slurm"
-
-    @property
-    def _slurm_group_id(self) -> str:
-        """Return the slurm group ID."""
-        return "64030"
-
-    @property
-    def _slurmd_user(self) -> str:
-        """Return the slurmd user."""
-        return "root"
-
-    @property
-    def _slurmd_group(self) -> str:
-        """Return the slurmd group."""
-        return "root"
-
-    @property
-    def _slurmrestd_user_id(self) -> str:
-        """Return the slurmrestd user ID."""
-        return "64031"
-
-    @property
-    def _slurmrestd_user_name(self) -> str:
-        """Return the slurmrestd user."""
-        return "slurmrestd"
-
-    @property
-    def _slurmrestd_group_id(self) -> str:
-        """Return the slurmrestd group ID."""
-        return "64031"
-
-    @property
-    def _slurmrestd_group_name(self) -> str:
-        """Return the slurmrestd group."""
-        return "slurmrestd"
-
     @property
     def slurm_component(self) -> str:
         """Return the slurm component we are."""
@@ -290,51 +466,64 @@ class SlurmOpsManagerBase:
 
         logger.info("#### Creating slurmrestd user and group")
 
-        try:
-            subprocess.check_output([
-                "groupadd",
-                "--gid",
-                self._slurmrestd_group_id,
-                self._slurmrestd_group_name
-            ])
-        except subprocess.CalledProcessError as e:
-            if e.returncode == 9:
-                logger.warning("## Group already exists.")
-            else:
+        # probe NSS first - skip the groupadd/adduser forks entirely
+        # when the accounts are already in place
+        if _group_exists(self._slurmrestd_group_name):
+            logger.warning("## Group already exists.")
+        else:
+            try:
+                subprocess.check_output([
+                    "groupadd",
+                    "--gid",
+                    self._slurmrestd_group_id,
+                    self._slurmrestd_group_name
+                ])
+            except subprocess.CalledProcessError as e:
                 logger.error(f"## Error creating group: {e}")
                 return False
 
-        try:
-            subprocess.check_output([
-                "adduser",
-                "--system",
-                "--gid", self._slurmrestd_group_id,
-                "--uid", self._slurmrestd_user_id,
-                "--no-create-home",
-                "--home", "/nonexistent",
-                self._slurmrestd_user_name
-            ])
-        except subprocess.CalledProcessError as e:
-            if e.returncode == 9:
-                logger.warning("## User already exists.")
-            else:
+        if _user_exists(self._slurmrestd_user_name):
+            logger.warning("## User already exists.")
+        else:
+            try:
+                subprocess.check_output([
+                    "adduser",
+                    "--system",
+                    "--gid", self._slurmrestd_group_id,
+                    "--uid", self._slurmrestd_user_id,
+                    "--no-create-home",
+                    "--home", "/nonexistent",
+                    self._slurmrestd_user_name
+                ])
+            except subprocess.CalledProcessError as e:
                 logger.error(f"## Error creating user: {e}")
                 return False
 
         logger.info("#### Created slurmrestd user and group")
 
-    def create_systemd_override_for_nofile(self):
-        """Create the override.conf file for slurm systemd service."""
+    def create_systemd_override_for_nofile(self) -> bool:
+        """Create the override.conf file for slurm systemd service.
+
+        Returns True if the override changed on disk - only then does
+        the caller need a systemd daemon-reload, which parses every unit
+        file on the system.
+        """
         systemd_override_dir = Path(
             f"/etc/systemd/system/{self._slurm_systemd_service}.d"
         )
-        if not systemd_override_dir.exists():
-            systemd_override_dir.mkdir(exist_ok=True)
+        systemd_override_dir.mkdir(exist_ok=True)
 
         systemd_override_conf = systemd_override_dir / 'override.conf'
         systemd_override_conf_tmpl = TEMPLATE_DIR / 'override.conf'
 
+        if systemd_override_conf.exists() and filecmp.cmp(
+                systemd_override_conf_tmpl, systemd_override_conf,
+                shallow=False):
+            logger.debug("## systemd override unchanged, skipping write")
+            return False
+
         shutil.copyfile(systemd_override_conf_tmpl, systemd_override_conf)
+        return True
 
     def create_configless_systemd_override(self, host, port):
         """Create the files needed to enable configless mode in slurmd.
@@ -348,8 +537,7 @@ class SlurmOpsManagerBase:
         systemd_override_dir = Path(
             f"/etc/systemd/system/{self._slurm_systemd_service}.d"
         )
-        if not systemd_override_dir.exists():
-            systemd_override_dir.mkdir(exist_ok=True)
+        systemd_override_dir.mkdir(exist_ok=True)
 
         target = systemd_override_dir / "configless.conf"
         source = TEMPLATE_DIR / "configless-drop-in.conf"
@@ -357,8 +545,9 @@ class SlurmOpsManagerBase:
 
         logger.debug("## Creating /etc/default/slurm for configless slurmd")
 
-        environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-        template = environment.get_template("configless.default.tmpl")
+        template = _template_environment().get_template(
+            "configless.default.tmpl"
+        )
 
         if operating_system() == 'ubuntu':
             target = Path("/etc/default/slurmd")
@@ -410,8 +599,13 @@ class SlurmOpsManagerBase:
             rmtree(base_path)
         base_path.mkdir()
 
-        cmd = f"tar --extract --directory {base_path} --file {nhc_tar}".split()
-        subprocess.run(cmd)
+        # extract in-process instead of forking tar - install-time only
+        # path, so the import is deferred. Extraction is sequential, so
+        # open in streaming mode ("r|*") to decompress in one pass
+        # without the random-access seeks of "r:*".
+        import tarfile
+        with tarfile.open(nhc_tar, "r|*") as tar:
+            tar.extractall(base_path)
 
         full_path = base_path / os.listdir(base_path)[0]
 
@@ -424,8 +618,7 @@ class SlurmOpsManagerBase:
         # the slurmd charm.
         try:
             locale = {'LC_ALL': 'C', 'LANG': 'C.UTF-8'}
-            cmd = f"./autogen.sh --prefix=/usr --sysconfdir=/etc \
-                                 --libexecdir={libdir}".split()
+            cmd = [*_AUTOGEN_BASE, f"--libexecdir={libdir}"]
             logger.info('##### NHC - running autogen')
             r = subprocess.run(cmd, cwd=full_path, env=locale,
                                stdout=subprocess.PIPE,
@@ -468,8 +661,7 @@ class SlurmOpsManagerBase:
         context = {'munge_user': self._munge_user,
                    'extra_configs': extra_configs}
 
-        environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-        template = environment.get_template('nhc.conf.tmpl')
+        template = _template_environment().get_template('nhc.conf.tmpl')
         try:
             target.write_text(template.render(context))
             return True
@@ -482,8 +674,7 @@ class SlurmOpsManagerBase:
 
         target = Path("/usr/sbin/omni-nhc-wrapper")
         context = {"nhc_params": params}
-        environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-        template = environment.get_template('omni-nhc-wrapper.tmpl')
+        template = _template_environment().get_template('omni-nhc-wrapper.tmpl')
 
         target.write_text(template.render(context))
         target.chmod(0o755) # everybody can read/execute, owner can write
@@ -520,8 +711,7 @@ class SlurmOpsManagerBase:
         # need to remove those
         for daemon in ["slurmd", "slurmdbd", "slurmctld"]:
             profile = logrotate_dir / daemon
-            if profile.exists():
-                profile.unlink()
+            profile.unlink(missing_ok=True)
 
     def slurm_config_nhc_values(self, interval=600, state='ANY,CYCLE'):
         """NHC parameters for slurm.conf."""
@@ -539,141 +729,209 @@ class SlurmOpsManagerBase:
         """Return munge version."""
         raise Exception("Inheriting object needs to define this property.")
 
-    def write_acct_gather_conf(self, context: dict) -> None:
-        """Render the acct_gather.conf."""
+    def _conf_target(self, target: Path) -> Path:
+        """Return where a config write should land.
+
+        Inside a staged_config block writes are redirected into the
+        staging directory and moved into place together on exit.
+        """
+        if self._staging_dir is not None:
+            return self._staging_dir / target.name
+        return target
+
+    @contextmanager
+    def staged_config(self):
+        """Stage config writes and move them into place together.
+
+        Config files rendered inside the block are written under a
+        temporary directory inside the slurm conf dir and renamed into
+        their final locations on exit, so a multi-file reconfig appears
+        on disk back-to-back instead of interleaved with renders.
+        Removals requested inside the block are deferred to the same
+        commit point.
+        """
+        staging = Path(tempfile.mkdtemp(prefix='.staging-',
+                                        dir=str(self._slurm_conf_dir)))
+        self._staging_dir = staging
+        self._staged_removals = []
+        try:
+            yield staging
+            for staged in staging.iterdir():
+                os.replace(staged, self._slurm_conf_dir / staged.name)
+            for removal in self._staged_removals:
+                removal.unlink(missing_ok=True)
+        finally:
+            self._staging_dir = None
+            self._staged_removals = []
+            rmtree(staging, ignore_errors=True)
+
+    def write_acct_gather_conf(self, context: dict) -> bool:
+        """Render the acct_gather.conf.
+
+        Returns True if the file changed on disk, False otherwise - the
+        daemons only pick the new values up on restart, so the caller
+        needs to know about changes here as much as for slurm.conf.
+        """
         template_name = 'acct_gather.conf.tmpl'
-        source = TEMPLATE_DIR / template_name
-        target = self._slurm_conf_dir / 'acct_gather.conf'
+        final = self._slurm_conf_dir / 'acct_gather.conf'
+        target = self._conf_target(final)
 
-        if not type(context) == dict:
+        if not isinstance(context, Mapping):
             raise TypeError("Incorrect type for config.")
 
-        if not source.exists():
-            raise FileNotFoundError(
-                "The acct_gather template cannot be found."
-            )
+        rendered_template = _template_environment().get_template(template_name)
+
+        # stream the render to a temp file and atomically rename into
+        # place so a concurrent reader never sees a missing or partial
+        # config and peak memory stays constant
+        tmp = target.with_suffix(target.suffix + '.tmp')
+        with open(tmp, 'wb') as rendered_file:
+            rendered_template.stream(context).dump(rendered_file,
+                                                   encoding='utf-8')
+
+        # compare against the final destination - inside a staged_config
+        # block target points into the staging dir, but "changed" means
+        # changed relative to what is live on disk
+        if final.exists() and filecmp.cmp(tmp, final, shallow=False):
+            tmp.unlink()
+            logger.debug(f"## {final} unchanged, skipping write")
+            return False
 
-        rendered_template = Environment(
-            loader=FileSystemLoader(TEMPLATE_DIR)
-        ).get_template(template_name)
+        os.replace(tmp, target)
+        return True
 
-        if target.exists():
-            target.unlink()
+    def remove_acct_gather_conf(self) -> bool:
+        """Remove acct_gather.conf.
 
-        target.write_text(
-            rendered_template.render(context)
-        )
+        Returns True if the file existed and was removed, False if there
+        was nothing to remove.
+        """
+        target = self._slurm_conf_dir / 'acct_gather.conf'
 
-    def remove_acct_gather_conf(self) -> None:
-        """Remove acct_gather.conf."""
+        # inside a staged_config block the unlink is deferred to the
+        # commit point, keeping the reconfig all-or-nothing on disk
+        if self._staging_dir is not None:
+            self._staged_removals.append(target)
+            return target.exists()
 
-        target = self._slurm_conf_dir / 'acct_gather.conf'
-        if target.exists():
+        try:
             target.unlink()
+            return True
+        except FileNotFoundError:
+            return False
 
-    def write_slurm_config(self, context) -> None:
-        """Render the context to a template, adding in common configs."""
+    def write_slurm_config(self, context) -> bool:
+        """Render the context to a template, adding in common configs.
 
-        common_config = {
-            'munge_socket': str(self._munge_socket),
-            'mail_prog': str(self._mail_prog),
-            'slurm_state_dir': str(self._slurm_state_dir),
-            'slurm_spool_dir': str(self._slurm_spool_dir),
-            'slurm_plugin_dir': str(self._slurm_plugin_dir),
-            'slurmdbd_log_file': str(self._slurmdbd_log_file),
-            'slurmd_log_file': str(self._slurmd_log_file),
-            'slurmctld_log_file': str(self._slurmctld_log_file),
-            'slurmdbd_pid_file': str(self._slurmdbd_pid_file),
-            'slurmd_pid_file': str(self._slurmd_pid_file),
-            'slurmctld_pid_file': str(self._slurmctld_pid_file),
-            'jwt_rsa_key_file': str(self._jwt_rsa_key_file),
-            'slurmctld_parameters': ",".join(self._slurmctld_parameters),
-            'slurm_plugstack_conf': str(self._slurm_plugstack_conf),
-            'slurm_user': str(self._slurm_user),
-            'slurmd_user': str(self._slurmd_user),
-        }
+        Returns True if the config file changed on disk, False when the
+        rendered content is identical to what is already there - in which
+        case the caller can skip restarting the slurm component.
+        """
 
         template_name = self._slurm_conf_template_name
-        source = self._slurm_conf_template_location
-        target = self._slurm_conf_path
+        final = self._slurm_conf_path
+        target = self._conf_target(final)
 
-        if not type(context) == dict:
+        if not isinstance(context, Mapping):
             raise TypeError("Incorrect type for config.")
 
-        if not source.exists():
-            raise FileNotFoundError(
-                "The slurm config template cannot be found."
-            )
-
-        # Preprocess merging slurmctld_parameters if they exist in the context
-        context_slurmctld_parameters = context.get("slurmctld_parameters")
+        # Preprocess merging slurmctld_parameters if they exist in the context.
+        # dict.fromkeys deduplicates while preserving insertion order, so the
+        # rendered parameter list is deterministic across invocations.
+        merged_slurmctld_parameters = ""
+        context_slurmctld_parameters = context.get("slurmctld_parameters", "")
         if context_slurmctld_parameters:
-            slurmctld_parameters = list(
-                set(common_config["slurmctld_parameters"].split(",")
-                    + context_slurmctld_parameters.split(","))
-            )
-
-            common_config["slurmctld_parameters"] = ",".join(
-                slurmctld_parameters
-            )
-            context.pop("slurmctld_parameters")
-
-        rendered_template = Environment(
-            loader=FileSystemLoader(TEMPLATE_DIR)
-        ).get_template(template_name)
+            merged_slurmctld_parameters = ",".join(dict.fromkeys(
+                self._slurmctld_parameters
+                + tuple(context_slurmctld_parameters.split(","))
+            ))
+
+        rendered_template = _template_environment().get_template(template_name)
+
+        # the common config wins over the context, with the merged
+        # slurmctld_parameters applied as a targeted overwrite on top
+        render_context = dict(context)
+        render_context.update(self._common_config)
+        if merged_slurmctld_parameters:
+            render_context["slurmctld_parameters"] = merged_slurmctld_parameters
+
+        # stream the render to a temp file so peak memory stays constant
+        # regardless of template size
+        tmp = target.with_suffix(target.suffix + '.tmp')
+        with open(tmp, 'wb') as rendered_file:
+            rendered_template.stream(render_context).dump(rendered_file,
+                                                          encoding='utf-8')
+
+        # skip the rename, chown and any subsequent restart when the
+        # rendered content matches what is live on disk - the final
+        # destination, which inside a staged_config block is not where
+        # the write lands
+        if final.exists() and filecmp.cmp(tmp, final, shallow=False):
+            tmp.unlink()
+            logger.debug(f"## {final} unchanged, skipping write")
+            return False
 
-        if target.exists():
-            target.unlink()
+        # fix up permissions and ownership, then atomically rename into
+        # place so a concurrent reader never sees a missing or partial
+        # config
+        if self._slurm_component == "slurmdbd":
+            tmp.chmod(0o600)
 
-        target.write_text(
-            rendered_template.render(
-                {**context, **common_config}
-            )
-        )
+        os.chown(tmp, _get_user_uid(self._slurm_user),
+                 _get_group_gid(self._slurm_group))
 
-        # set correct permissions and ownership for configuration file
-        if self._slurm_component == "slurmdbd":
-            target.chmod(0o600)
+        os.replace(tmp, target)
 
-        user_group = f"{self._slurm_user}:{self._slurm_group}"
-        subprocess.call(["chown", user_group, target])
+        return True
 
     def restart_slurm_component(self) -> bool:
         """Restart the slurm component."""
         return self.slurm_systemctl("restart")
 
     def write_munge_key(self, munge_key):
-        """Base64 decode and write the munge key."""
-        key = b64decode(munge_key.encode())
-        self._munge_key_path.write_bytes(key)
+        """Base64 decode and write the munge key.
+
+        Accepts either str or bytes - b64decode handles both, so no
+        intermediate encode is needed.
+        """
+        self._munge_key_path.write_bytes(b64decode(munge_key))
 
     def write_jwt_rsa(self, jwt_rsa):
         """Write the jwt_rsa key."""
 
         # Remove jwt_rsa if exists.
-        if self._jwt_rsa_key_file.exists():
-            self._jwt_rsa_key_file.write_bytes(os.urandom(2048))
-            self._jwt_rsa_key_file.unlink()
+        self._jwt_rsa_key_file.unlink(missing_ok=True)
 
         # Write the jwt_rsa key to the file and chmod 0600,
         # chown to slurm_user.
         self._jwt_rsa_key_file.write_text(jwt_rsa)
         self._jwt_rsa_key_file.chmod(0o600)
-        subprocess.call([
-            "chown",
-            self._slurm_user,
-            str(self._jwt_rsa_key_file),
-        ])
+        os.chown(self._jwt_rsa_key_file, _get_user_uid(self._slurm_user), -1)
+
+    def write_cgroup_conf(self, content) -> bool:
+        """Write the cgroup.conf file.
+
+        Returns True if the file changed on disk, False otherwise.
+        """
+        final = self._slurm_conf_dir / 'cgroup.conf'
+
+        # compare against the final destination - inside a staged_config
+        # block the write is redirected, but "changed" means changed
+        # relative to what is live on disk
+        if final.exists() and final.read_text() == content:
+            logger.debug(f"## {final} unchanged, skipping write")
+            return False
+
+        self._conf_target(final).write_text(content)
+        return True
 
-    def write_cgroup_conf(self, content):
-        """Write the cgroup.conf file."""
-        cgroup_conf_path = self._slurm_conf_dir / 'cgroup.conf'
-        cgroup_conf_path.write_text(content)
+    def get_munge_key_bytes(self) -> bytes:
+        """Read the munge key and return it base64 encoded as bytes."""
+        return b64encode(self._munge_key_path.read_bytes())
 
     def get_munge_key(self) -> str:
-        """Read the bytes, encode to base64, decode to a string, return."""
-        munge_key = self._munge_key_path.read_bytes()
-        return b64encode(munge_key).decode()
+        """Return the base64 encoded munge key as a string."""
+        return self.get_munge_key_bytes().decode()
 
     def start_munged(self):
         """Start munge.service."""
@@ -681,7 +939,7 @@ class SlurmOpsManagerBase:
 
         munge = self._munged_systemd_service
         try:
-            subprocess.check_output(["systemctl", "start", munge])
+            _run_spawn(["systemctl", "start", munge], check=True)
         except subprocess.CalledProcessError as e:
             logger.error(f"## Error starting munge: {e}")
             return False
@@ -689,25 +947,23 @@ class SlurmOpsManagerBase:
         return self._is_active_munged()
 
     def _is_active_munged(self):
+        active = _unit_is_active_over_dbus(self._munged_systemd_service)
+        if active is not None:
+            return active
+
         munge = self._munged_systemd_service
-        try:
-            status = subprocess.check_output(f"systemctl is-active {munge}",
-                                             shell=True)
-            status = status.decode().strip()
-            if 'active' in status:
-                logger.debug("#### Munge daemon active")
-                return True
-            else:
-                logger.error(f"## Munge not running: {status}")
-                return False
-        except subprocess.CalledProcessError as e:
-            logger.error(f"## Error querring munged - {e}")
-            return False
+        r = subprocess.run(["systemctl", "--quiet", "is-active", munge],
+                           **_SPAWN_KW)
+        if r.returncode == 0:
+            logger.debug("#### Munge daemon active")
+            return True
+        logger.error("## Munge not running")
+        return False
 
     def stop_munged(self):
         """Stop munge.service."""
         logger.debug("## Stoping munge")
-        subprocess.call(["systemctl", "stop", self._munged_systemd_service])
+        _run_spawn(["systemctl", "stop", self._munged_systemd_service])
 
     def check_munged(self) -> bool:
         """Check if munge is working correctly."""
@@ -719,8 +975,7 @@ class SlurmOpsManagerBase:
         # check if munge is working, i.e., can use the credentials correctly
         try:
             logger.debug("## Testing if munge is working correctly")
-            cmd = "munge -n"
-            munge = subprocess.Popen(shlex.split(cmd),
+            munge = subprocess.Popen(["munge", "-n"],
                                      stdout=subprocess.PIPE,
                                      stderr=subprocess.PIPE)
             unmunge = subprocess.Popen(["unmunge"],
@@ -743,31 +998,52 @@ class SlurmOpsManagerBase:
 
         Return True on success, and False otherwise.
         """
-        try:
-            logger.debug("## Restarting munge")
-            cmd = f"systemctl restart {self._munged_systemd_service}"
-            subprocess.check_output(shlex.split(cmd))
-        except subprocess.CalledProcessError as e:
-            logger.error(f"## Error restarting munged - {e}")
+        logger.debug("## Restarting munge")
+
+        restarted = _systemctl_over_dbus("restart",
+                                         self._munged_systemd_service)
+        if restarted is None:
+            try:
+                _run_spawn(["systemctl", "restart",
+                            self._munged_systemd_service], check=True)
+            except subprocess.CalledProcessError as e:
+                logger.error(f"## Error restarting munged - {e}")
+                return False
+        elif not restarted:
             return False
 
         return self.check_munged()
 
-    def slurm_cmd(self, command, arg_string):
-        """Run a slurm command."""
-        if command not in self._slurm_cmds:
+    def slurm_cmd(self, command, args):
+        """Run a slurm command.
+
+        args may be a pre-tokenized sequence of arguments, or a string
+        which is tokenized with shlex so quoted arguments containing
+        whitespace survive intact.
+        """
+        if command not in _SLURM_CMDS:
             logger.error(f"{command} is not a slurm command.")
             return -1
 
+        argv = shlex.split(args) if isinstance(args, str) else list(args)
+
         try:
-            return subprocess.call([f"{command}"] + arg_string.split())
+            return subprocess.run([command, *argv], **_SPAWN_KW).returncode
         except subprocess.CalledProcessError as e:
             logger.error(f"Error running {command} - {e}")
             return -1
 
     def generate_jwt_rsa(self) -> str:
         """Generate the rsa key to encode the jwt with."""
-        return RSA.generate(2048).export_key('PEM').decode()
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption(),
+        ).decode()
 
     def _setup_plugstack_dir_and_config(self) -> None:
         """Create plugstack directory and config."""
@@ -779,13 +1055,12 @@ class SlurmOpsManagerBase:
             rmtree(plugstack_dir)
 
         plugstack_dir.mkdir()
-        subprocess.call(["chown", "-R", f"{self._slurm_user}:{self._slurm_group}", plugstack_dir])
+        _chown_recursive(plugstack_dir, self._slurm_user, self._slurm_group)
 
         # Write the plugstack config.
         plugstack_conf = self._slurm_plugstack_conf
 
-        if plugstack_conf.exists():
-            plugstack_conf.unlink()
+        plugstack_conf.unlink(missing_ok=True)
 
         plugstack_conf.write_text(f"include {plugstack_dir}/*.conf")
 
@@ -793,11 +1068,12 @@ class SlurmOpsManagerBase:
         """Create needed paths with correct permisions."""
 
         if "slurmd" == self._slurm_component:
-            user = f"{self._slurmd_user}:{self._slurmd_group}"
+            user, group = self._slurmd_user, self._slurmd_group
         elif "slurmrestd" == self._slurm_component:
-            user = f"{self._slurmrestd_user_name}:{self._slurmrestd_group_name}"
+            user = self._slurmrestd_user_name
+            group = self._slurmrestd_group_name
         else:
-            user = f"{self._slurm_user}:{self._slurm_group}"
+            user, group = self._slurm_user, self._slurm_group
 
         all_paths = [
             self._slurm_conf_dir,
@@ -805,7 +1081,8 @@ class SlurmOpsManagerBase:
             self._slurm_state_dir,
             self._slurm_spool_dir,
         ]
+        # chown in-process instead of forking chown -R; the directories
+        # are freshly created or small, so the walk is cheap
         for syspath in all_paths:
-            if not syspath.exists():
-                syspath.mkdir()
-            subprocess.call(["chown", "-R", user, syspath])
+            syspath.mkdir(exist_ok=True)
+            _chown_recursive(syspath, user, group)
@@ -1,4 +1,21 @@
 #!/usr/bin/python3
 """This module provides the SlurmDebManager and SlurmRpmManager."""
-from .slurm_deb_manager import SlurmDebManager # noqa
-from .slurm_rpm_manager import SlurmRpmManager # noqa
+
+# Resolve the managers lazily (PEP 562) so importing this module does
+# not execute both submodules when only one is needed - each charm run
+# instantiates a single manager for the host OS.
+_MANAGERS = {
+    "SlurmDebManager": "slurm_deb_manager",
+    "SlurmRpmManager": "slurm_rpm_manager",
+}
+
+__all__ = list(_MANAGERS)
+
+
+def __getattr__(name):
+    """Import the requested manager class on first access."""
+    if name in _MANAGERS:
+        from importlib import import_module
+        module = import_module(f".{_MANAGERS[name]}", __package__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,34 @@
 #!/usr/bin/env python3
 """This module provides the SlurmRpmManager."""
 import logging
+import os
 import subprocess
+from functools import cached_property
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-from slurm_ops_manager.slurm_ops_base import SlurmOpsManagerBase
+from slurm_ops_manager.slurm_ops_base import (
+    _get_group_gid,
+    _get_user_uid,
+    _group_exists,
+    _run_spawn,
+    _user_exists,
+    SlurmOpsManagerBase,
+)
 
 
 logger = logging.getLogger()
 
+# The repo file has exactly two variables; plain str.format keeps Jinja
+# entirely off this path.
+_REPO_TEMPLATE = """\
+[{title}]
+name=Omnivector Solutions RPM Repository
+baseurl={baseurl}
+enabled=1
+gpgcheck=0
+priority=1
+"""
+
 
 class SlurmRpmManager(SlurmOpsManagerBase):
     """Slurm debian operations manager."""
@@ -26,88 +45,130 @@ class SlurmRpmManager(SlurmOpsManagerBase):
     def _mail_prog(self) -> Path:
         return Path("/usr/bin/mailx")
 
-    @property
+    @cached_property
     def slurm_version(self) -> str:
-        """Return slurm verion."""
-        cmd = 'yum info -C slurm | grep "^Version"'
-        locale = {'LC_ALL': 'C', 'LANG': 'C.UTF-8'}
-        version = subprocess.check_output(cmd, shell=True, env=locale)
-        return version.decode().split(":")[-1].strip()
+        """Return slurm verion, resolved at most once per instance."""
+        version = subprocess.check_output(
+            ["rpm", "-q", "--queryformat", "%{VERSION}", "slurm"])
+        return version.decode().strip()
 
-    @property
+    @cached_property
     def munge_version(self) -> str:
-        """Return munge verion."""
-        cmd = 'yum info -C munge | grep "^Version"'
-        locale = {'LC_ALL': 'C', 'LANG': 'C.UTF-8'}
-        version = subprocess.check_output(cmd, shell=True, env=locale)
-        return version.decode().split(":")[-1].strip()
+        """Return munge verion, resolved at most once per instance."""
+        version = subprocess.check_output(
+            ["rpm", "-q", "--queryformat", "%{VERSION}", "munge"])
+        return version.decode().strip()
+
+    def _slurm_installed(self) -> bool:
+        """Return True if the slurm component rpm is already installed."""
+        ret = subprocess.run(["rpm", "-q", f"slurm-{self._slurm_component}"],
+                             stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL)
+        return ret.returncode == 0
 
     def _install_slurm_from_rpm(self) -> bool:
         """Install Slurm rpms.
 
         Returns True on success and False otherwise.
         """
+        # install the dependencies, munge and the slurm component in a
+        # single yum transaction so the solver only runs once
         slurm_component = self._slurm_component
-        logger.debug(f"## Installing dependencies for {slurm_component}")
+        packages = ["pciutils", "logrotate", "mailx", "munge",
+                    f"slurm-{slurm_component}", "slurm"]
 
-        # update/install specific needed dependencies
-        subprocess.check_output(["yum", "install", "--assumeyes",
-                                 "pciutils", "logrotate", "mailx", "munge"])
-        subprocess.check_output(["systemctl", "enable", self._munged_systemd_service])
-
-        logger.debug(f"## Installing {slurm_component}")
+        logger.debug(f"## Installing {slurm_component} and dependencies")
         try:
+            # weak dependencies are not needed; skipping them trims the
+            # solver run and the download set
             subprocess.check_output(["yum", "install", "--assumeyes",
-                                     f"slurm-{slurm_component}", "slurm"])
+                                     "--setopt=install_weak_deps=False",
+                                     *packages])
         except subprocess.CalledProcessError as e:
             logger.error(f"Error installing {slurm_component} - {e}")
             return False
 
         logger.info("#### All packages installed!")
 
-        # munge rpm does not create a munge key, so we need to create one
-        logger.info("#### Creating munge key")
-        keycmd = f"dd if=/dev/urandom of={str(self._munge_key_path)} bs=1 count=1024"
-        subprocess.check_output(keycmd.split())
-        usergroup = f"{self._munge_user}:{self._munge_group}"
-        subprocess.check_output(f"chown {usergroup} {str(self._munge_key_path)}".split())
-        subprocess.check_output(f"chmod 0400 {str(self._munge_key_path)}".split())
-        logger.info("#### Created munge key")
+        return True
+
+    def _post_install_setup(self) -> bool:
+        """Provision accounts, the munge key and systemd units.
+
+        These steps are cheap and individually guarded, so they run on
+        every setup_slurm call - including when the rpms were already
+        present (golden image, or a previous run that failed between
+        the yum transaction and here).
+
+        Returns True on success and False otherwise.
+        """
+        # enable munge and the slurm unit with one systemctl invocation
+        _run_spawn(["systemctl", "enable",
+                    self._munged_systemd_service,
+                    self._slurm_systemd_service], check=True)
+
+        # munge rpm does not create a munge key, so we need to create one,
+        # keeping any key already provisioned on a previous run
+        if not self._munge_key_path.exists():
+            logger.info("#### Creating munge key")
+            # mode-on-create with O_EXCL: the key is 0400 from the first
+            # instant and the separate chmod syscall disappears
+            fd = os.open(self._munge_key_path,
+                         os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o400)
+            try:
+                os.write(fd, os.urandom(1024))
+                os.fchown(fd,
+                          _get_user_uid(self._munge_user),
+                          _get_group_gid(self._munge_group))
+            finally:
+                os.close(fd)
+            logger.info("#### Created munge key")
+
+        if not self._create_slurm_user_and_group():
+            return False
 
+        # we need to override the default service unit for slurmrestd only
+        if "slurmrestd" == self._slurm_component:
+            self.create_slurmrestd_user_group()
+            self.setup_slurmrestd_systemd_unit()
+
+        return True
+
+    def _create_slurm_user_and_group(self) -> bool:
+        """Create the slurm user and group if they do not exist yet.
+
+        Returns True on success and False otherwise.
+        """
         # current rpms do not create a slurm user and group, so we create it
         logger.info("#### Creating slurm user and group")
 
-        try:
-            subprocess.check_output(["groupadd", "--gid", self._slurm_group_id,
-                                                 self._slurm_group])
-        except subprocess.CalledProcessError as e:
-            if e.returncode == 9:
-                logger.warning("## Group already exists.")
-            else:
+        if _group_exists(self._slurm_group):
+            logger.warning("## Group already exists.")
+        else:
+            try:
+                subprocess.check_output(["groupadd", "--gid",
+                                         self._slurm_group_id,
+                                         self._slurm_group])
+            except subprocess.CalledProcessError as e:
                 logger.error(f"## Error creating group: {e}")
                 return False
 
-        try:
-            subprocess.check_output(["adduser", "--system",
-                                                "--gid", self._slurm_group_id,
-                                                "--uid", self._slurm_user_id,
-                                                "--no-create-home",
-                                                "--home", "/nonexistent",
-                                                self._slurm_user])
-        except subprocess.CalledProcessError as e:
-            if e.returncode == 9:
-                logger.warning("## User already exists.")
-            else:
+        if _user_exists(self._slurm_user):
+            logger.warning("## User already exists.")
+        else:
+            try:
+                subprocess.check_output(["adduser", "--system",
+                                         "--gid", self._slurm_group_id,
+                                         "--uid", self._slurm_user_id,
+                                         "--no-create-home",
+                                         "--home", "/nonexistent",
+                                         self._slurm_user])
+            except subprocess.CalledProcessError as e:
                 logger.error(f"## Error creating user: {e}")
                 return False
 
         logger.info("#### Created slurm user and group")
 
-        # we need to override the default service unit for slurmrestd only
-        if "slurmrestd" == self._slurm_component:
-            self.create_slurmrestd_user_group()
-            self.setup_slurmrestd_systemd_unit()
-
         return True
 
     def _setup_repo(self, custom_repo: str) -> bool:
@@ -129,15 +190,19 @@ class SlurmRpmManager(SlurmOpsManagerBase):
                        "baseurl": "https://omnivector-solutions.github.io/slurm-repo/23.02.6/centos7/$basearch"} # noqa
         logger.debug(f"## Configuring repository for Slurm rpms: {context}")
 
-        template_dir = Path(__file__).parent / "templates/"
-        environment = Environment(loader=FileSystemLoader(template_dir))
-        template = environment.get_template("omnirepo_centos.repo.tmpl")
-
         target = Path("/etc/yum.repos.d/omni.repo")
-        target.write_text(template.render(context))
+        rendered = _REPO_TEMPLATE.format(**context)
+
+        # the metadata fetch is only needed when the repo definition
+        # actually changed since the last run
+        if target.exists() and target.read_text() == rendered:
+            logger.debug("## Repo definition unchanged, skipping makecache")
+            return True
+
+        target.write_text(rendered)
 
         try:
-            subprocess.check_output(["yum", "makecache"])
+            _run_spawn(["yum", "makecache"], check=True)
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"## Error setting up repo: {e}")
@@ -160,7 +225,17 @@ class SlurmRpmManager(SlurmOpsManagerBase):
         if not self._setup_repo(custom_repo):
             return False
 
-        successful_installation = self._install_slurm_from_rpm()
+        # fast path: the yum transaction already ran on a previous
+        # reconciliation - the rpmdb probe is milliseconds, yum is
+        # seconds. Only the package install is skipped; accounts, the
+        # munge key and unit setup are (re)checked below regardless.
+        if self._slurm_installed():
+            logger.debug(f"## {self._slurm_component} already installed")
+        elif not self._install_slurm_from_rpm():
+            return False
+
+        if not self._post_install_setup():
+            return False
 
         # create needed paths with correct permisions
         self._setup_paths()
@@ -168,6 +243,4 @@ class SlurmRpmManager(SlurmOpsManagerBase):
         if self._slurm_component in ["slurmctld", "slurmd"]:
             self._setup_plugstack_dir_and_config()
 
-        self.slurm_systemctl('enable')
-
-        return successful_installation
+        return True
@@ -1,113 +1,221 @@
 #!/usr/bin/env python3
 """slurm-ops-manager utils."""
+import glob
 import logging
 import os
 import re
+import shlex
 import socket
 import subprocess
-import sys
+import time
 
+from functools import lru_cache
 from pathlib import Path
 
 
 logger = logging.getLogger()
 
-OS_RELEASE = Path("/etc/os-release").read_text().split("\n")
-OS_RELEASE_CTXT = {
-    k: v.strip("\"")
-    for k, v in [item.split("=") for item in OS_RELEASE if item != '']
-}
 
+def _parse_os_release(text):
+    """Parse os-release shell variable assignments into a dict.
 
+    The file is shell syntax, so values may be quoted, contain '=' or
+    embed spaces; shlex handles all of that where a naive split cannot.
+    """
+    ctxt = {}
+    for token in shlex.split(text, comments=True):
+        key, sep, value = token.partition("=")
+        if sep:
+            ctxt[key] = value
+    return ctxt
+
+
+@lru_cache(maxsize=1)
 def operating_system():
     """Return what operating system we are running."""
-    return OS_RELEASE_CTXT['ID']
+    return _parse_os_release(Path("/etc/os-release").read_text())['ID']
+
+
+def _read_procfs(path, maxbytes=4096):
+    """Read a small /proc or /sys pseudo-file and return its bytes.
+
+    Pseudo-files are generated whole by the kernel on read; one os.read
+    with a page-sized buffer skips the io stack's buffering objects and
+    the stat an open() performs.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, maxbytes)
+    finally:
+        os.close(fd)
 
 
 def get_real_mem():
-    """Return the real memory."""
+    """Return the real memory in mebibytes."""
+    # two sysconf calls answer without any file parsing at all
     try:
-        real_mem = subprocess.check_output(
-            "free -m | grep -oP '\\d+' | head -n 1",
-            shell=True
-        )
-    except subprocess.CalledProcessError as e:
-        logger.error(e)
-        sys.exit(-1)
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        phys_pages = os.sysconf("SC_PHYS_PAGES")
+        if page_size > 0 and phys_pages > 0:
+            return str(page_size * phys_pages // (1024 * 1024))
+    except (OSError, ValueError):
+        pass
+
+    # MemTotal is the first line of /proc/meminfo, in kB
+    try:
+        for line in _read_procfs("/proc/meminfo").splitlines():
+            if line.startswith(b"MemTotal:"):
+                return str(int(line.split()[1]) // 1024)
+    except (OSError, IndexError, ValueError) as e:
+        logger.error(f"Unable to determine real memory: {e}")
 
-    return real_mem.decode().strip()
+    return None
 
 
 def _get_cpu_info():
     """Return the socket info."""
+    physical_ids = set()
+    cores_per_socket = 0
+    siblings = 0
+
+    # the topology lives in /proc/cpuinfo; parsing it directly saves
+    # the lscpu fork and its full-text regex scans
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_ids.add(value.strip())
+                elif key == "cpu cores":
+                    cores_per_socket = int(value)
+                elif key == "siblings":
+                    siblings = int(value)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading /proc/cpuinfo: {e}")
+
+    if not (physical_ids and cores_per_socket and siblings):
+        # some architectures (e.g. arm64) omit the topology fields
+        return _get_cpu_info_lscpu()
+
+    cpus = len(os.sched_getaffinity(0))
+    return f"CPUs={cpus} "\
+           f"ThreadsPerCore={siblings // cores_per_socket} "\
+           f"CoresPerSocket={cores_per_socket} "\
+           f"SocketsPerBoard={len(physical_ids)}"
+
+
+# One anchored alternation picks up all four lscpu topology lines in a
+# single pass over the output.
+_LSCPU_RE = re.compile(
+    r"^(CPU|Thread per core|Core per socket|Socket):\s*(\S+)$",
+    re.MULTILINE,
+)
+
+
+def _get_cpu_info_lscpu():
+    """Return the socket info parsed from lscpu output."""
     try:
         lscpu = \
             subprocess.check_output(
-                "lscpu",
-                shell=True
+                ["lscpu"]
             ).decode().replace("(s)", "")
-    except subprocess.CalledProcessError as e:
-        print(e)
-        sys.exit(-1)
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.error(f"Error running lscpu: {e}")
+        return None
 
-    cpu_info = {
-        'CPU:': '',
-        'Thread per core:': '',
-        'Core per socket:': '',
-        'Socket:': '',
-    }
+    cpu_info = {}
+    for key, value in _LSCPU_RE.findall(lscpu):
+        cpu_info.setdefault(key, value)
 
     try:
-        for key in cpu_info:
-            cpu_info[key] = re.search(f"{key}.*", lscpu)\
-                              .group()\
-                              .replace(f"{key}", "")\
-                              .replace(" ", "")
-    except Exception as error:
-        print(f"Unable to set Node configuration: {error}")
-        sys.exit(-1)
-
-    return f"CPUs={cpu_info['CPU:']} "\
-           f"ThreadsPerCore={cpu_info['Thread per core:']} "\
-           f"CoresPerSocket={cpu_info['Core per socket:']} "\
-           f"SocketsPerBoard={cpu_info['Socket:']}"
+        return f"CPUs={cpu_info['CPU']} "\
+               f"ThreadsPerCore={cpu_info['Thread per core']} "\
+               f"CoresPerSocket={cpu_info['Core per socket']} "\
+               f"SocketsPerBoard={cpu_info['Socket']}"
+    except KeyError as error:
+        logger.error(f"Unable to set Node configuration: {error}")
+        return None
 
 
 # Get the number of GPUs and check that they exist at /dev/nvidiaX
 def _get_gpus():
-    gpu = int(
-        subprocess.check_output(
-            "lspci | grep -i nvidia | awk '{print $1}' "
-            "| cut -d : -f 1 | sort -u | wc -l",
-            shell=True
-        )
-    )
-
-    for i in range(gpu):
-        gpu_path = "/dev/nvidia" + str(i)
-        if not os.path.exists(gpu_path):
+    # lspci only reformats what the kernel exposes under
+    # /sys/bus/pci/devices; read the vendor and class IDs directly and
+    # count NVIDIA (0x10de) display controllers (class 0x03xxxx)
+    gpus = 0
+    for vendor_path in glob.glob("/sys/bus/pci/devices/*/vendor"):
+        try:
+            if _read_procfs(vendor_path).strip() != b"0x10de":
+                continue
+            device_dir = os.path.dirname(vendor_path)
+            pci_class = _read_procfs(os.path.join(device_dir, "class"))
+            if pci_class.startswith(b"0x03"):
+                gpus += 1
+        except OSError:
+            continue
+
+    if gpus == 0:
+        # no PCI view (e.g. containers) - fall back to the device nodes
+        return len(glob.glob("/dev/nvidia[0-9]*"))
+
+    # the driver must expose a /dev node per GPU for slurmd to use them
+    for i in range(gpus):
+        if not os.path.exists(f"/dev/nvidia{i}"):
             return 0
-    return gpu
+    return gpus
 
 
+@lru_cache(maxsize=1)
 def get_hostname():
-    """Return the hostname."""
+    """Return the hostname, resolved at most once per process."""
     return socket.gethostname().split(".")[0]
 
 
+# Node hardware only changes across reboots or hotplug, so cache the
+# assembled inventory for a few minutes.
+_INVENTORY_CACHE_TTL = 300
+_inventory_cache = (0.0, None)
+
+
+def invalidate_inventory_cache():
+    """Force the next get_inventory call to re-probe the hardware."""
+    global _inventory_cache
+    _inventory_cache = (0.0, None)
+
+
 def get_inventory():
     """Assemble and return the node info."""
+    global _inventory_cache
+
+    cached_at, cached = _inventory_cache
+    now = time.monotonic()
+    if cached is not None and (now - cached_at) < _INVENTORY_CACHE_TTL:
+        return cached
+
     hostname = get_hostname()
     mem = get_real_mem()
     cpu_info = _get_cpu_info()
     gpus = _get_gpus()
 
-    node_info = f"NodeName={hostname} "\
-                f"NodeAddr={hostname} "\
-                f"State=UNKNOWN "\
-                f"{cpu_info} "\
-                f"RealMemory={mem}"
-    if (gpus > 0):
-        node_info = node_info + f" Gres={gpus}"
+    # probes that failed return None and their field is omitted, rather
+    # than aborting the whole hook process
+    parts = [
+        f"NodeName={hostname}",
+        f"NodeAddr={hostname}",
+        "State=UNKNOWN",
+    ]
+    if cpu_info is not None:
+        parts.append(cpu_info)
+    if mem is not None:
+        parts.append(f"RealMemory={mem}")
+    if gpus > 0:
+        parts.append(f"Gres={gpus}")
+
+    node_info = " ".join(parts)
+
+    # only cache complete answers so transient failures are retried
+    if cpu_info is not None and mem is not None:
+        _inventory_cache = (now, node_info)
 
     return node_info